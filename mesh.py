@@ -2,6 +2,15 @@ import math
 import struct
 import json
 
+GLB_ALIGNMENT = 4
+GLB_MAGIC = b'glTF'
+GLB_LEN_HEADER = 12
+GLB_CHUNK_BIN = b'BIN\x00'
+GLB_CHUNK_JSON = b'JSON'
+GLB_VERSION = struct.pack('<I', 2)
+GLB_FLOAT = 5126
+GLB_MODE_TRIANGLES = 4
+
 def subtract(a, b):
     (ax, ay, az) = a
     (bx, by, bz) = b
@@ -106,15 +115,6 @@ class Mesh:
         return vertex_bv, normal_bv, min_pos, max_pos
 
     def write_glb(self, glb_file):
-        GLB_ALIGNMENT = 4
-        GLB_MAGIC = b'glTF'
-        GLB_LEN_HEADER = 12
-        GLB_CHUNK_BIN = b'BIN\x00'
-        GLB_CHUNK_JSON = b'JSON'
-        GLB_VERSION = pack_u32(2)
-        GLB_FLOAT = 5126
-        GLB_MODE_TRIANGLES = 4
-        
         vertex_bv, normal_bv, min_pos, max_pos = self.make_glb_buffer_views()
         
         vert_offset = 0
@@ -201,22 +201,24 @@ class Mesh:
             ]
         }
 
-        gltf_json_str = json.dumps(gltf_json)
-        gltf_json_bytes = bytes(gltf_json_str, 'utf-8')
-        gltf_json_bytes = pad_json(gltf_json_bytes, GLB_ALIGNMENT)
+        write_glb_chunks(glb_file, gltf_json, buf)
 
-        json_length = len(gltf_json_bytes)
-        json_chunk = pack_u32(json_length) + GLB_CHUNK_JSON + gltf_json_bytes
+def write_glb_chunks(glb_file, gltf_json, buf):
+    gltf_json_str = json.dumps(gltf_json)
+    gltf_json_bytes = bytes(gltf_json_str, 'utf-8')
+    gltf_json_bytes = pad_json(gltf_json_bytes, GLB_ALIGNMENT)
 
-        bin_len = len(buf)
-        bin_chunk = pack_u32(bin_len) + GLB_CHUNK_BIN + buf
+    json_length = len(gltf_json_bytes)
+    json_chunk = pack_u32(json_length) + GLB_CHUNK_JSON + gltf_json_bytes
 
-        total_length = GLB_LEN_HEADER + len(json_chunk) + len(bin_chunk)
-        header = GLB_MAGIC + GLB_VERSION + pack_u32(total_length)
+    bin_len = len(buf)
+    bin_chunk = pack_u32(bin_len) + GLB_CHUNK_BIN + buf
 
-        glb = header + json_chunk + bin_chunk
-        glb_file.write(glb)
-        
+    total_length = GLB_LEN_HEADER + len(json_chunk) + len(bin_chunk)
+    header = GLB_MAGIC + GLB_VERSION + pack_u32(total_length)
+
+    glb = header + json_chunk + bin_chunk
+    glb_file.write(glb)
 
 def pad_json(binary, alignment):
     if len(binary) % alignment == 0:
@@ -237,3 +239,6 @@ def pack_u32(value):
 
 def pack_vec3(x, y, z):
     return struct.pack('<fff', x, y, z)
+
+def pack_vec4(x, y, z, w):
+    return struct.pack('<ffff', x, y, z, w)
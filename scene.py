@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+import json
+from argparse import ArgumentParser
+
+from mesh import (
+    GLB_ALIGNMENT,
+    GLB_FLOAT,
+    GLB_MODE_TRIANGLES,
+    pack_vec3,
+    pack_vec4,
+    pad_binary,
+    write_glb_chunks,
+)
+from main import fetch_params
+from superseashells import SuperSeashell
+
+EXT_INSTANCING = 'EXT_mesh_gpu_instancing'
+
+# Same z-up to y-up correction that Mesh.write_glb puts on its node.
+Y_UP_MATRIX = [
+    1, 0,  0, 0,
+    0, 0, -1, 0,
+    0, 1,  0, 0,
+    0, 0,  0, 1
+]
+
+def normalize_numbers(value):
+    if isinstance(value, dict):
+        return {k: normalize_numbers(v) for (k, v) in value.items()}
+    elif isinstance(value, list):
+        return [normalize_numbers(x) for x in value]
+    elif isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    else:
+        return value
+
+def params_key(parameters):
+    # Compare numbers by value so [2, 2] and [2.0, 2.0] share a mesh
+    return json.dumps(normalize_numbers(parameters), sort_keys=True)
+
+class Scene:
+    """
+    A collection of seashells written out as a single GLB file.
+
+    Shells with identical parameters share one mesh. The mesh is generated
+    and stored once, and every copy of it is placed with
+    EXT_mesh_gpu_instancing. Transforms are given in the shells' own z-up
+    coordinate system, the whole scene is rotated to y-up on export.
+    """
+    def __init__(self):
+        # params key -> {'parameters', 'mesh', 'instances': [(t, r, s)]}
+        self.groups = {}
+
+    def add_shell(
+            self,
+            shell,
+            translation=(0.0, 0.0, 0.0),
+            rotation=(0.0, 0.0, 0.0, 1.0),
+            scale=(1.0, 1.0, 1.0)):
+        """
+        Add a shell to the scene. rotation is a unit quaternion (x, y, z, w)
+        """
+        key = params_key(shell.parameters)
+        if key not in self.groups:
+            self.groups[key] = {
+                'parameters': shell.parameters,
+                'mesh': None,
+                'instances': []
+            }
+        instance = (tuple(translation), tuple(rotation), tuple(scale))
+        self.groups[key]['instances'].append(instance)
+
+    def write_glb(self, glb_file):
+        if not self.groups:
+            raise RuntimeError('Scene has no shells to write')
+
+        bin_views = []
+        bin_len = 0
+        buffer_views = []
+        accessors = []
+        meshes = []
+        nodes = [
+            {
+                "name": "Scene Root",
+                "matrix": Y_UP_MATRIX,
+                "children": []
+            }
+        ]
+        use_instancing = False
+
+        def add_buffer_view(name, data):
+            nonlocal bin_len
+            buffer_views.append({
+                "name": name,
+                "buffer": 0,
+                "byteLength": len(data),
+                "byteOffset": bin_len
+            })
+            padded = pad_binary(data, GLB_ALIGNMENT)
+            bin_views.append(padded)
+            bin_len += len(padded)
+            return len(buffer_views) - 1
+
+        def add_accessor(name, data, accessor_type, count, **extra):
+            accessor = {
+                "name": name,
+                "bufferView": add_buffer_view(name, data),
+                "componentType": GLB_FLOAT,
+                "type": accessor_type,
+                "count": count
+            }
+            accessor.update(extra)
+            accessors.append(accessor)
+            return len(accessors) - 1
+
+        for group in self.groups.values():
+            # SuperSeashell appends to its mesh on every call, so generate
+            # from a fresh shell (the caller's may already have a mesh) and
+            # only once even if the scene is written repeatedly.
+            if group['mesh'] is None:
+                shell = SuperSeashell(group['parameters'])
+                group['mesh'] = shell.generate_mesh()
+            mesh = group['mesh']
+            vertex_bv, normal_bv, min_pos, max_pos = \
+                mesh.make_glb_buffer_views()
+            vertex_count = 3 * len(mesh.faces)
+
+            position_id = add_accessor(
+                "Vertices",
+                vertex_bv,
+                "VEC3",
+                vertex_count,
+                min=min_pos,
+                max=max_pos)
+            normal_id = add_accessor(
+                "Normals", normal_bv, "VEC3", vertex_count)
+
+            mesh_id = len(meshes)
+            meshes.append({
+                "name": "Super Seashell",
+                "primitives": [
+                    {
+                        "attributes": {
+                            "POSITION": position_id,
+                            "NORMAL": normal_id
+                        },
+                        "mode": GLB_MODE_TRIANGLES
+                    }
+                ]
+            })
+
+            instances = group['instances']
+            node = {"mesh": mesh_id}
+            if len(instances) == 1:
+                # A lone shell doesn't need the extension, a plain node
+                # transform is enough.
+                [(translation, rotation, scale)] = instances
+                node["translation"] = list(translation)
+                node["rotation"] = list(rotation)
+                node["scale"] = list(scale)
+            else:
+                use_instancing = True
+                translation_bv = b''
+                rotation_bv = b''
+                scale_bv = b''
+                for (translation, rotation, scale) in instances:
+                    translation_bv += pack_vec3(*translation)
+                    rotation_bv += pack_vec4(*rotation)
+                    scale_bv += pack_vec3(*scale)
+
+                count = len(instances)
+                node["extensions"] = {
+                    EXT_INSTANCING: {
+                        "attributes": {
+                            "TRANSLATION": add_accessor(
+                                "Instance Translations",
+                                translation_bv,
+                                "VEC3",
+                                count),
+                            "ROTATION": add_accessor(
+                                "Instance Rotations",
+                                rotation_bv,
+                                "VEC4",
+                                count),
+                            "SCALE": add_accessor(
+                                "Instance Scales",
+                                scale_bv,
+                                "VEC3",
+                                count)
+                        }
+                    }
+                }
+
+            nodes[0]["children"].append(len(nodes))
+            nodes.append(node)
+
+        buf = b''.join(bin_views)
+
+        gltf_json = {
+            "asset": {
+                "version": "2.0"
+            },
+            "scene": 0,
+            "scenes": [
+                {
+                    "nodes": [0]
+                }
+            ],
+            "nodes": nodes,
+            "meshes": meshes,
+            "buffers": [
+                {
+                    "byteLength": len(buf)
+                }
+            ],
+            "bufferViews": buffer_views,
+            "accessors": accessors
+        }
+
+        if use_instancing:
+            # Without the extension a viewer would only draw one copy of
+            # each shell, so don't let it silently drop the rest.
+            gltf_json["extensionsUsed"] = [EXT_INSTANCING]
+            gltf_json["extensionsRequired"] = [EXT_INSTANCING]
+
+        write_glb_chunks(glb_file, gltf_json, buf)
+
+if __name__ == '__main__':
+    parser = ArgumentParser()
+    parser.add_argument(
+        'scene_id',
+        help=(
+            'Name of the scene. This will be used to read '
+            'scenes/<scene_id>.json and write models/<scene_id>.glb'))
+    args = parser.parse_args()
+
+    scene_desc = fetch_params(f'scenes/{args.scene_id}.json')
+    scene = Scene()
+    for desc in scene_desc['shells']:
+        shell_params = fetch_params(f"params/{desc['shape_id']}.json")
+        scene.add_shell(
+            SuperSeashell(shell_params),
+            translation=desc.get('translation', (0.0, 0.0, 0.0)),
+            rotation=desc.get('rotation', (0.0, 0.0, 0.0, 1.0)),
+            scale=desc.get('scale', (1.0, 1.0, 1.0)))
+
+    glb_fname = f'models/{args.scene_id}.glb'
+    with open(glb_fname, 'wb') as f:
+        scene.write_glb(f)